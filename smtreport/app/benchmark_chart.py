@@ -0,0 +1,94 @@
+# app/benchmark_chart.py
+#
+# Misst Größe des Figure-JSON und Erstellungszeit der Tantiemen-Chart für synthetische,
+# mehrjährige Kataloge. Aufruf: python smtreport/app/benchmark_chart.py
+
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from main import aggregate_chart_data, build_tantiemen_chart
+
+def create_sample_data(jahre=10, titel=200, waehrungen=('EUR', 'USD', 'GBP', 'CAD', 'AUD'), seed=42):
+    """
+    Erzeugt einen aggregierten DataFrame wie aggregate_einnahmen_pro_autor_wahrung ihn liefert.
+    """
+    rng = np.random.default_rng(seed)
+    monat_namen = ['Januar', 'Februar', 'März', 'April', 'Mai', 'Juni', 'Juli',
+                   'August', 'September', 'Oktober', 'November', 'Dezember']
+    index = pd.MultiIndex.from_product(
+        [range(2024 - jahre + 1, 2025), range(1, 13), [f"Titel {i}" for i in range(titel)], list(waehrungen)],
+        names=['Jahr', 'Monat_num', 'Titel', 'Währung']
+    )
+    df = index.to_frame(index=False)
+    df['Autor'] = 'Autor'
+    df['Monat'] = df['Monat_num'].map(lambda m: monat_namen[m - 1])
+    df['Tantiemen'] = rng.gamma(1.5, 20.0, len(df)).round(2)
+    df['Gelesene Seiten'] = rng.poisson(500, len(df))
+    df['Gesamtverkäufe'] = rng.poisson(10, len(df))
+    return df
+
+def build_legacy_chart(df, gruppierung=None):
+    """
+    Bisheriger Ansatz: px.bar mit einem Balken pro Verkaufsmonat, text_auto und hover_data.
+    """
+    df = df.copy()
+    df['Verkaufsmonat'] = df['Monat'] + ' ' + df['Jahr'].astype(str)
+    keys = ['Jahr', 'Monat_num', 'Verkaufsmonat'] + ([gruppierung] if gruppierung else [])
+    chart_data = df.groupby(keys)[['Tantiemen', 'Gelesene Seiten', 'Gesamtverkäufe']].sum().reset_index()
+    return px.bar(
+        chart_data,
+        x='Verkaufsmonat',
+        y='Tantiemen',
+        color=gruppierung,
+        text_auto=True,
+        hover_data={
+            'Verkaufsmonat': False,
+            'Tantiemen': ':,.2f',
+            'Gelesene Seiten': ':,.0f',
+            'Gesamtverkäufe': ':,.0f'
+        }
+    )
+
+def measure(build):
+    """
+    Gibt die Erstellungszeit (inkl. Serialisierung) in ms und die JSON-Größe in KB zurück.
+    """
+    start = time.perf_counter()
+    payload = build().to_json()
+    dauer = (time.perf_counter() - start) * 1000
+    return dauer, len(payload.encode('utf-8')) / 1024
+
+def main():
+    df = create_sample_data()
+    print(f"{len(df)} Datensätze")
+    print(f"{'Variante':<40} {'Zeit (ms)':>10} {'JSON (KB)':>10}")
+
+    varianten = [
+        ("Bisher, gesamt", lambda: build_legacy_chart(df)),
+        ("Bisher, pro Titel", lambda: build_legacy_chart(df, 'Titel')),
+    ]
+    for granularitaet in ['Monat', 'Quartal', 'Jahr']:
+        for gruppierung in [None, 'Titel', 'Währung']:
+            def build(granularitaet=granularitaet, gruppierung=gruppierung):
+                chart_data = aggregate_chart_data(df, granularitaet=granularitaet, gruppierung=gruppierung)
+                return build_tantiemen_chart(chart_data, granularitaet=granularitaet, gruppierung=gruppierung)
+            varianten.append((f"Neu, {granularitaet}, {gruppierung or 'gesamt'}", build))
+    # Gleiche Anzahl Serien wie die bisherige Chart: 50 Titel (Obergrenze der UI) und alle 200 Titel
+    df_50 = df[df['Titel'].isin([f"Titel {i}" for i in range(50)])]
+    varianten += [
+        ("Bisher, pro Titel (50 Titel)", lambda: build_legacy_chart(df_50, 'Titel')),
+        ("Neu, Monat, Titel (50 Titel, WebGL)",
+         lambda: build_tantiemen_chart(aggregate_chart_data(df_50, gruppierung='Titel', top_n=50), gruppierung='Titel')),
+        ("Neu, Monat, Titel (Top 200, WebGL)",
+         lambda: build_tantiemen_chart(aggregate_chart_data(df, gruppierung='Titel', top_n=200), gruppierung='Titel')),
+    ]
+
+    for name, build in varianten:
+        dauer, groesse = measure(build)
+        print(f"{name:<40} {dauer:>10.1f} {groesse:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,28 @@ import streamlit as st
 import pandas as pd
 import openpyxl
 import io
-import plotly.express as px
+import math
+import numpy as np
+import plotly.graph_objects as go
+
+# Zeitebenen für die Chart-Aggregation und ihre Plotly-Periodenlänge bzw. Datumsformat
+CHART_GRANULARITAETEN = {
+    'Monat': {'periode': 'M1', 'monate': 1, 'format': '%m.%Y'},
+    'Quartal': {'periode': 'M3', 'monate': 3, 'format': 'Q%q %Y'},
+    'Jahr': {'periode': 'M12', 'monate': 12, 'format': '%Y'},
+}
+# Maximale Anzahl Achsenbeschriftungen, darüber wird nur jede n-te Periode beschriftet
+CHART_MAX_TICKS = 12
+# Maximale Anzahl Serien inkl. 'Sonstige', in der die übrigen Serien zusammengefasst werden
+CHART_TOP_N = 10
+# Anzeigename der zusammengefassten Serien
+CHART_SONSTIGE = 'Sonstige'
+# Ab dieser Anzahl Datenpunkte werden WebGL-Linien (Scattergl) statt gestapelter Balken verwendet
+CHART_WEBGL_SCHWELLE = 1000
+# Anzeigename der Summenlinie über alle Serien im WebGL-Modus
+CHART_GESAMT = 'Gesamt'
+# Kennzahlen, die für die Chart aggregiert werden
+CHART_WERTE = ['Tantiemen', 'Gelesene Seiten', 'Gesamtverkäufe']
 
 def load_excel_file(uploaded_file):
     try:
@@ -186,6 +207,205 @@ def format_eu_number(x, decimal_places=0):
     except:
         return str(x)
 
+def aggregate_chart_data(df, granularitaet='Monat', gruppierung=None, top_n=CHART_TOP_N):
+    """
+    Aggregiert die Kennzahlen für die Chart serverseitig auf Monat, Quartal oder Jahr.
+    - gruppierung: optionale Spalte (z.B. 'Titel' oder 'Währung') für die Aufteilung in Serien.
+    - top_n: maximale Anzahl Serien. Bei mehr Serien bleiben die top_n - 1 mit den höchsten Tantiemen erhalten,
+      alle weiteren werden zusammengefasst und in der Spalte 'Ist_Sonstige' markiert. Mindestens 2.
+    """
+    if granularitaet not in CHART_GRANULARITAETEN:
+        raise ValueError(f"Unbekannte Zeitebene: {granularitaet}")
+    if top_n < 2:
+        raise ValueError(f"top_n muss mindestens 2 sein, damit neben 'Sonstige' eine Serie bleibt: {top_n}")
+
+    spalten = CHART_WERTE + ([gruppierung] if gruppierung else [])
+    chart_df = df[spalten].copy()
+
+    # Erster Monat der Periode (Monat, Quartal oder Jahr)
+    monat = df['Monat_num'].astype(int)
+    if granularitaet == 'Quartal':
+        monat = (monat - 1) // 3 * 3 + 1
+    elif granularitaet == 'Jahr':
+        monat = 1
+    chart_df['Periode'] = pd.to_datetime(pd.DataFrame({'year': df['Jahr'].astype(int), 'month': monat, 'day': 1}))
+
+    if gruppierung:
+        # Nur die Top-N Serien nach Tantiemen behalten, den Rest über die Markierung zusammenfassen,
+        # damit ein echter Titel 'Sonstige' nicht mit den übrigen Serien vermischt wird
+        summen = chart_df.groupby(gruppierung)['Tantiemen'].sum()
+        chart_df['Ist_Sonstige'] = False
+        if len(summen) > top_n:
+            top = summen.nlargest(top_n - 1).index
+            chart_df['Ist_Sonstige'] = ~chart_df[gruppierung].isin(top)
+            chart_df.loc[chart_df['Ist_Sonstige'], gruppierung] = ''
+        keys = ['Periode', 'Ist_Sonstige', gruppierung]
+    else:
+        keys = ['Periode']
+
+    return chart_df.groupby(keys)[CHART_WERTE].sum().reset_index()
+
+def format_periode(periode, granularitaet):
+    """
+    Formatiert den Beginn einer Periode als Beschriftung, z.B. 'Januar 2024', 'Q1 2024' oder '2024'.
+    """
+    monat_namen = ['Januar', 'Februar', 'März', 'April', 'Mai', 'Juni', 'Juli',
+                   'August', 'September', 'Oktober', 'November', 'Dezember']
+    if granularitaet == 'Monat':
+        return f"{monat_namen[periode.month - 1]} {periode.year}"
+    if granularitaet == 'Quartal':
+        return f"Q{(periode.month - 1) // 3 + 1} {periode.year}"
+    return str(periode.year)
+
+def anzahl_chart_punkte(chart_data, gruppierung=None):
+    """
+    Anzahl der gezeichneten Datenpunkte: jede Serie enthält alle Perioden (fehlende mit 0 aufgefüllt).
+    """
+    anzahl_serien = len(chart_data[['Ist_Sonstige', gruppierung]].drop_duplicates()) if gruppierung else 1
+    return chart_data['Periode'].nunique() * anzahl_serien
+
+def kompakter_dtype(werte, nachkommastellen=0):
+    """
+    Wählt den kleinsten von Plotly binär kodierten Datentyp, der die Werte ohne Verlust darstellt.
+    - nachkommastellen: Anzahl der Dezimalstellen, die bei der Anzeige exakt erhalten bleiben müssen.
+    """
+    if werte.size == 0 or not np.isfinite(werte).all():
+        return np.float64
+    minimum, maximum = werte.min(), werte.max()
+    if nachkommastellen == 0 and (werte == np.round(werte)).all():
+        for dtype in [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32]:
+            if np.iinfo(dtype).min <= minimum and maximum <= np.iinfo(dtype).max:
+                return dtype
+    # float32 hat 24 Bit Mantisse: unter 2^23 / 10^n bleiben n gerundete Nachkommastellen erhalten
+    if max(abs(minimum), abs(maximum)) * 10 ** nachkommastellen < 2 ** 23:
+        return np.float32
+    return np.float64
+
+def build_tantiemen_chart(chart_data, granularitaet='Monat', gruppierung=None, title=None, webgl_schwelle=CHART_WEBGL_SCHWELLE):
+    """
+    Erstellt die Tantiemen-Chart aus den Daten von aggregate_chart_data.
+    Bei lückenlosen Perioden wird eine Datumsachse mit rein numerischen Arrays verwendet,
+    bei Lücken (z.B. nur Januar mehrerer Jahre) eine Kategorieachse mit nebeneinanderliegenden Balken.
+    Oberhalb von webgl_schwelle Datenpunkten werden WebGL-Linien statt gestapelter Balken gezeichnet,
+    ergänzt um eine Linie mit der Summe aller Serien.
+    """
+    einstellungen = CHART_GRANULARITAETEN[granularitaet]
+    use_webgl = anzahl_chart_punkte(chart_data, gruppierung) > webgl_schwelle
+
+    # Prüfe, ob zwischen erster und letzter Periode alle Perioden vorhanden sind
+    perioden = chart_data['Periode'].drop_duplicates().sort_values()
+    erste_periode = perioden.iloc[0]
+    letzte_periode = perioden.iloc[-1]
+    anzahl_perioden = ((letzte_periode.year - erste_periode.year) * 12 + letzte_periode.month - erste_periode.month) // einstellungen['monate'] + 1
+    lueckenlos = len(perioden) == anzahl_perioden
+
+    # Einmal in eine Tabelle Periode x Serie umformen, fehlende Perioden mit 0 auffüllen
+    serien_spalte = gruppierung or 'Serie'
+    if not gruppierung:
+        chart_data = chart_data.assign(Ist_Sonstige=False, Serie='Tantiemen')
+    tabelle = chart_data.pivot_table(
+        index='Periode', columns=['Ist_Sonstige', serien_spalte], values=CHART_WERTE, aggfunc='sum', fill_value=0
+    ).reindex(perioden, fill_value=0)
+
+    # Serien nach Tantiemen absteigend sortieren, 'Sonstige' immer zuletzt
+    summen = tabelle['Tantiemen'].sum()
+    serien = sorted(summen.index, key=lambda serie: (serie[0], -summen[serie]))
+    namen = [CHART_SONSTIGE if ist_sonstige else str(name) for ist_sonstige, name in serien]
+    tantiemen = tabelle['Tantiemen'][serien].to_numpy(dtype=np.float64).round(2)
+    kennzahlen = np.stack(
+        [tabelle[spalte][serien].to_numpy(dtype=np.float64).round(0) for spalte in ['Gelesene Seiten', 'Gesamtverkäufe']],
+        axis=2
+    )
+
+    # Summenlinie, da die WebGL-Linien nicht gestapelt werden
+    mit_gesamt = use_webgl and len(namen) > 1
+    if mit_gesamt:
+        namen.append(CHART_GESAMT)
+        tantiemen = np.column_stack([tantiemen, tantiemen.sum(axis=1).round(2)])
+        kennzahlen = np.concatenate([kennzahlen, kennzahlen.sum(axis=1, keepdims=True)], axis=1)
+
+    # Tantiemen nur als y, die Zählwerte als customdata, jeweils im kleinsten verlustfreien Datentyp
+    tantiemen = tantiemen.astype(kompakter_dtype(tantiemen, nachkommastellen=2))
+    kennzahlen = kennzahlen.astype(kompakter_dtype(kennzahlen))
+    hovertemplate = (
+        'Tantiemen: %{y:,.2f}<br>'
+        'Gelesene Seiten: %{customdata[0]:,.0f}<br>'
+        'Gesamtverkäufe: %{customdata[1]:,.0f}'
+        '<extra>%{fullData.name}</extra>'
+    )
+
+    if lueckenlos:
+        # Statt eines x-Arrays pro Serie nur Start und mittlere Periodenlänge (ms) übertragen. Beginnend in der
+        # Periodenmitte bleibt jeder Punkt trotz unterschiedlicher Monatslängen in seiner Periode,
+        # xperiod richtet ihn dort wieder exakt aus.
+        periode_ms = einstellungen['monate'] * 365.2425 / 12 * 24 * 60 * 60 * 1000
+        x_args = dict(
+            x0=erste_periode.timestamp() * 1000 + periode_ms / 2,
+            dx=periode_ms,
+            xperiod=einstellungen['periode'],
+            xperiodalignment='middle',
+        )
+    else:
+        x_args = dict(x=[format_periode(periode, granularitaet) for periode in perioden])
+
+    if use_webgl:
+        # Scattergl kennt kein stackgroup, daher einzelne Linien und die Summe als gepunktete Linie
+        traces = [
+            go.Scattergl(
+                name=name,
+                mode='lines',
+                y=tantiemen[:, i],
+                line=dict(dash='dot') if mit_gesamt and i == len(namen) - 1 else None,
+                customdata=kennzahlen[:, i],
+                hovertemplate=hovertemplate,
+                **x_args
+            )
+            for i, name in enumerate(namen)
+        ]
+    else:
+        # Werte nur bei einer einzelnen Serie direkt an die Balken schreiben
+        traces = [
+            go.Bar(
+                name=name,
+                y=tantiemen[:, i],
+                texttemplate='%{y:,.2f}' if not gruppierung else None,
+                customdata=kennzahlen[:, i],
+                hovertemplate=hovertemplate,
+                **x_args
+            )
+            for i, name in enumerate(namen)
+        ]
+    fig = go.Figure(data=traces)
+
+    if lueckenlos:
+        # Eine Beschriftung pro Periode (bzw. pro Vielfachem davon), mittig unter den Balken
+        dtick_monate = einstellungen['monate'] * max(1, math.ceil(anzahl_perioden / CHART_MAX_TICKS))
+        xaxis = dict(
+            type='date',
+            tick0=erste_periode.strftime('%Y-%m-%d'),
+            dtick=f"M{dtick_monate}",
+            ticklabelmode='period',
+            tickformat=einstellungen['format'],
+            hoverformat=einstellungen['format']
+        )
+    else:
+        # Nur vorhandene Perioden in zeitlicher Reihenfolge anzeigen
+        xaxis = dict(
+            type='category',
+            categoryorder='array',
+            categoryarray=[format_periode(periode, granularitaet) for periode in perioden]
+        )
+
+    fig.update_layout(
+        title=title,
+        barmode='stack',
+        hovermode='x unified',
+        showlegend=bool(gruppierung),
+        xaxis=dict(title='', tickangle=45, **xaxis),
+        yaxis=dict(title='')
+    )
+    return fig
+
 def main():
     
     # Überschrift und Beschreibung (optional)
@@ -599,50 +819,34 @@ def main():
             # **Neuer Abschnitt für die Plotly Chart Darstellung**
             # Überprüfen, ob mehrere Monate vorhanden sind
             if filtered_df['Verkaufsmonat'].nunique() > 1:
-                # Aggregiere die Tantiemen nach Verkaufsmonat
-                chart_data = filtered_df.groupby('Verkaufsmonat')[['Tantiemen', 'Gelesene Seiten', 'Gesamtverkäufe']].sum().reset_index()
+                # Auswahl von Zeitebene, Aufteilung und maximaler Anzahl Serien für die Chart
+                chart_col1, chart_col2, chart_col3 = st.columns(3)
+                with chart_col1:
+                    granularitaet = st.selectbox("⏱️ Zeitebene", list(CHART_GRANULARITAETEN), index=0)
+                with chart_col2:
+                    aufteilung = st.selectbox("🧩 Aufteilen nach", ["Keine", "Titel", "Währung"], index=0)
+                with chart_col3:
+                    top_n = st.number_input("🔝 Max. Serien", min_value=2, max_value=50, value=CHART_TOP_N, step=1)
                 
-                # Extrahiere Jahr und Monat und füge sie als separate Spalten hinzu
-                chart_data['Jahr_num'] = chart_data['Verkaufsmonat'].apply(lambda x: int(x.split()[1]) if len(x.split()) > 1 else 0)
-                chart_data['Monat_num'] = chart_data['Verkaufsmonat'].apply(lambda x: month_order.get(x.split()[0], 13))
+                gruppierung = None if aufteilung == "Keine" else aufteilung
                 
-                # Sortiere nach Jahr und Monatnummer aufsteigend
-                chart_data = chart_data.sort_values(['Jahr_num', 'Monat_num'])
-                
-                # Optional: Entferne die Hilfsspalten nach der Sortierung
-                chart_data = chart_data.drop(columns=['Jahr_num', 'Monat_num'])
-                
-                # Erstelle eine Plotly Bar Chart mit sortierter Verkaufsmonat
-                fig = px.bar(
-                    chart_data, 
-                    x='Verkaufsmonat', 
-                    y='Tantiemen', 
-                    title='📈 Übersicht der Tantiemen nach Verkaufsmonat',
-                    labels={'Tantiemen': 'Tantiemen', 'Verkaufsmonat': 'Monat und Jahr'},
-                    text_auto=True,
-                    hover_data={
-                        'Verkaufsmonat': False,
-                        'Tantiemen': ':,.2f',
-                        'Gelesene Seiten': ':,.0f',
-                        'Gesamtverkäufe': ':,.0f'
-                    }
-                )
-                
-                # Entferne die Beschriftungen der X- und Y-Achse
-                fig.update_layout(
-                    xaxis_title='',
-                    yaxis_title=''
-                )
+                # Aggregiere die Tantiemen serverseitig nach Zeitebene (und ggf. Titel/Währung)
+                chart_data = aggregate_chart_data(filtered_df, granularitaet=granularitaet, gruppierung=gruppierung, top_n=int(top_n))
                 
-                # Optional: Winkelt die x-Achsen-Beschriftung für bessere Lesbarkeit
-                fig.update_layout(
-                    xaxis=dict(
-                        tickangle=45
-                    )
+                # Erstelle die Chart mit kompakten numerischen Traces
+                zeitebene_titel = {'Monat': 'Verkaufsmonat', 'Quartal': 'Quartal', 'Jahr': 'Jahr'}[granularitaet]
+                fig = build_tantiemen_chart(
+                    chart_data,
+                    granularitaet=granularitaet,
+                    gruppierung=gruppierung,
+                    title=f'📈 Übersicht der Tantiemen nach {zeitebene_titel}'
                 )
                 
                 # Anzeige der Chart in Streamlit
                 st.plotly_chart(fig, use_container_width=True)
+                # Hinweis anhand der tatsächlich erzeugten Traces, damit er immer zur Chart passt
+                if fig.data[0].type == 'scattergl':
+                    st.caption("ℹ️ Wegen der vielen Datenpunkte werden Linien statt gestapelter Balken angezeigt, die Summe als gepunktete Linie 'Gesamt'.")
             # **Ende des neuen Abschnitts**
         else:
                 st.info("🟡 Keine Daten gefunden für die ausgewählten Filter.")
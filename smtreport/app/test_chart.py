@@ -0,0 +1,114 @@
+# app/test_chart.py
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark_chart import build_legacy_chart, create_sample_data
+from main import CHART_GESAMT, CHART_SONSTIGE, aggregate_chart_data, build_tantiemen_chart, kompakter_dtype
+
+def create_df(zeilen):
+    """
+    Erzeugt einen DataFrame wie aggregate_einnahmen_pro_autor_wahrung aus (Jahr, Monat_num, Titel, Tantiemen).
+    """
+    df = pd.DataFrame(zeilen, columns=['Jahr', 'Monat_num', 'Titel', 'Tantiemen'])
+    df['Währung'] = 'EUR'
+    df['Gelesene Seiten'] = 100
+    df['Gesamtverkäufe'] = 1
+    return df
+
+@pytest.mark.parametrize('monat, quartalsbeginn', [(1, 1), (3, 1), (4, 4), (6, 4), (7, 7), (9, 7), (10, 10), (12, 10)])
+def test_quartal_beginnt_im_ersten_monat(monat, quartalsbeginn):
+    chart_data = aggregate_chart_data(create_df([(2024, monat, 'A', 1.0)]), granularitaet='Quartal')
+    assert chart_data['Periode'].tolist() == [pd.Timestamp(2024, quartalsbeginn, 1)]
+
+def test_summen_entsprechen_eingabe_bei_lueckenhaftem_index():
+    df = create_df([(2023, m, t, m * 1.5) for m in range(1, 13) for t in ['A', 'B', 'C']])
+    # Gefilterte Daten haben keinen fortlaufenden Index
+    df = df[df['Monat_num'] % 2 == 0]
+    for granularitaet in ['Monat', 'Quartal', 'Jahr']:
+        chart_data = aggregate_chart_data(df, granularitaet=granularitaet, gruppierung='Titel', top_n=2)
+        for spalte in ['Tantiemen', 'Gelesene Seiten', 'Gesamtverkäufe']:
+            assert chart_data[spalte].sum() == pytest.approx(df[spalte].sum())
+    assert aggregate_chart_data(df, granularitaet='Jahr')['Tantiemen'].tolist() == pytest.approx([df['Tantiemen'].sum()])
+
+def test_top_n_fasst_uebrige_serien_zusammen():
+    df = create_df([(2024, 1, 'A', 50.0), (2024, 1, 'B', 40.0), (2024, 1, 'Sonstige', 30.0), (2024, 1, 'D', 20.0), (2024, 2, 'D', 5.0)])
+    chart_data = aggregate_chart_data(df, gruppierung='Titel', top_n=3)
+
+    einzeln = chart_data[~chart_data['Ist_Sonstige']]
+    assert sorted(einzeln['Titel'].unique()) == ['A', 'B']
+    # Der echte Titel 'Sonstige' wird mit D zusammengefasst, nicht als eigene Serie geführt
+    assert chart_data.loc[chart_data['Ist_Sonstige'], 'Tantiemen'].tolist() == [50.0, 5.0]
+
+    fig = build_tantiemen_chart(chart_data, gruppierung='Titel')
+    assert [trace.name for trace in fig.data] == ['A', 'B', CHART_SONSTIGE]
+
+def test_top_n_ohne_zusammenfassung_bei_wenigen_serien():
+    df = create_df([(2024, 1, 'A', 1.0), (2024, 1, 'Sonstige', 2.0)])
+    chart_data = aggregate_chart_data(df, gruppierung='Titel', top_n=2)
+    assert not chart_data['Ist_Sonstige'].any()
+    assert sorted(chart_data['Titel']) == ['A', 'Sonstige']
+
+def test_top_n_untergrenze():
+    df = create_df([(2024, 1, 'A', 3.0), (2024, 1, 'B', 2.0), (2024, 1, 'C', 1.0)])
+    chart_data = aggregate_chart_data(df, gruppierung='Titel', top_n=2)
+    fig = build_tantiemen_chart(chart_data, gruppierung='Titel')
+    assert [trace.name for trace in fig.data] == ['A', CHART_SONSTIGE]
+    with pytest.raises(ValueError):
+        aggregate_chart_data(df, gruppierung='Titel', top_n=1)
+
+def test_fehlende_perioden_werden_mit_null_aufgefuellt():
+    df = create_df([(2024, 1, 'A', 1.0), (2024, 2, 'A', 2.0), (2024, 3, 'A', 3.0), (2024, 2, 'B', 4.0)])
+    fig = build_tantiemen_chart(aggregate_chart_data(df, gruppierung='Titel'), gruppierung='Titel')
+    assert [list(trace.y) for trace in fig.data] == [[1.0, 2.0, 3.0], [0.0, 4.0, 0.0]]
+
+def test_webgl_linien_mit_summe():
+    df = create_df([(2024, 1, 'A', 1.0), (2024, 2, 'A', 2.0), (2024, 1, 'B', 4.0)])
+    fig = build_tantiemen_chart(aggregate_chart_data(df, gruppierung='Titel'), gruppierung='Titel', webgl_schwelle=1)
+    assert [trace.type for trace in fig.data] == ['scattergl'] * 3
+    assert [trace.name for trace in fig.data] == ['B', 'A', CHART_GESAMT]
+    assert [list(trace.y) for trace in fig.data] == [[4.0, 0.0], [1.0, 2.0], [5.0, 2.0]]
+    assert fig.data[2].customdata.tolist() == [[200, 2], [100, 1]]
+
+def test_kompakte_datentypen():
+    df = create_df([(2024, 1, 'A', 1234.56), (2024, 2, 'A', 7.89)])
+    fig = build_tantiemen_chart(aggregate_chart_data(df))
+    assert fig.data[0].y.dtype == np.float32
+    assert fig.data[0].customdata.dtype == np.uint8
+    assert kompakter_dtype(np.array([-5.0, 70000.0])) == np.int32
+    assert kompakter_dtype(np.array([3e9, 1.0])) == np.uint32
+    assert kompakter_dtype(np.array([1e6, 0.01]), nachkommastellen=2) == np.float64
+
+def test_achse_je_nach_lueckenlosigkeit():
+    lueckenlos = create_df([(2023, 12, 'A', 1.0), (2024, 1, 'A', 2.0)])
+    fig = build_tantiemen_chart(aggregate_chart_data(lueckenlos))
+    assert fig.layout.xaxis.type == 'date'
+    assert fig.layout.xaxis.dtick == 'M1'
+    assert fig.layout.xaxis.tick0 == '2023-12-01'
+
+    nur_januar = create_df([(2022, 1, 'A', 1.0), (2024, 1, 'A', 2.0)])
+    fig = build_tantiemen_chart(aggregate_chart_data(nur_januar))
+    assert fig.layout.xaxis.type == 'category'
+    assert list(fig.layout.xaxis.categoryarray) == ['Januar 2022', 'Januar 2024']
+
+@pytest.mark.parametrize('granularitaet', ['Monat', 'Quartal', 'Jahr'])
+def test_x0_dx_bleibt_in_der_periode(granularitaet):
+    df = create_df([(jahr, monat, 'A', 1.0) for jahr in range(2000, 2030) for monat in range(1, 13)])
+    df = df[df['Jahr'] * 12 + df['Monat_num'] >= 2000 * 12 + 2]
+    chart_data = aggregate_chart_data(df, granularitaet=granularitaet)
+    trace = build_tantiemen_chart(chart_data, granularitaet=granularitaet).data[0]
+    positionen = pd.to_datetime(trace.x0 + trace.dx * np.arange(len(trace.y)), unit='ms')
+    zeitebene = {'Monat': 'M', 'Quartal': 'Q', 'Jahr': 'Y'}[granularitaet]
+    assert (positionen.to_period(zeitebene).start_time == chart_data['Periode']).all()
+
+def test_webgl_payload_bei_realistischen_daten():
+    # 10 Jahre x 50 Titel (Obergrenze der UI) x 5 Währungen
+    df = create_sample_data(jahre=10, titel=50)
+    fig = build_tantiemen_chart(aggregate_chart_data(df, gruppierung='Titel', top_n=50), gruppierung='Titel')
+    assert {trace.type for trace in fig.data} == {'scattergl'}
+
+    groesse = len(fig.to_json().encode('utf-8'))
+    bisher = len(build_legacy_chart(df, 'Titel').to_json().encode('utf-8'))
+    assert groesse < 150 * 1024
+    assert groesse < 0.75 * bisher